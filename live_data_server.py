@@ -4,20 +4,204 @@ Real-time market data server using yfinance
 Serves current 2025 market data for TradingView charts
 """
 
+import gzip
 import json
 import time
 import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qsl
 import yfinance as yf
 import pandas as pd
+import numpy as np
 from typing import Dict, List, Any
 
+try:
+    import orjson  # Optional: much faster serializer for large /history payloads
+except ImportError:
+    orjson = None
+
+try:
+    import brotli  # Optional: better ratio than gzip for large JSON responses
+except ImportError:
+    brotli = None
+
+# Verbose per-request logging of the history pipeline
+DEBUG = False
+
+# Responses smaller than this are not worth compressing
+COMPRESS_MIN_BYTES = 1024
+
+def create_upstream_session():
+    """Build one pooled HTTP session shared by every yfinance call"""
+    try:
+        # Recent yfinance releases expect a curl_cffi session impersonating a browser
+        from curl_cffi import requests as curl_requests
+        return curl_requests.Session(impersonate="chrome")
+    except ImportError:
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=32, pool_maxsize=64))
+        return session
+
+# Reused across requests so Yahoo connections stay alive instead of re-handshaking TLS
+YF_SESSION = create_upstream_session()
+
+# Bounded pool for blocking yfinance calls - caps concurrency towards Yahoo regardless of
+# how many request threads are waiting. Multi-symbol dashboard loads are not batched through
+# yf.download: it still issues one chart request per ticker, so a batching window would only
+# add latency and serialize fetches that this pool already runs in parallel.
+FETCH_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix='yfinance')
+# Covers the 20s primary fetch plus the 30s daily fallback inside fetch_history
+FETCH_TIMEOUT = 60
+
+def json_default(obj):
+    """Convert numpy arrays and scalars for the stdlib json fallback"""
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def to_json_bytes(data):
+    """Serialize a response payload (numpy columns allowed) to compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, separators=(',', ':'), default=json_default).encode('utf-8')
+
+class TTLCache:
+    """Bounded, thread-safe LRU cache whose entries expire after a TTL"""
+    
+    def __init__(self, maxsize=256, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        """Return the cached value, or None if missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting the least recently used entries past maxsize"""
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+def choose_encoding(accept_encoding):
+    """Pick the best supported Content-Encoding from an Accept-Encoding header"""
+    accepted = set()
+    for part in accept_encoding.lower().split(','):
+        name, _, params = part.partition(';')
+        params = params.strip()
+        try:
+            quality = float(params[2:]) if params.startswith('q=') else 1.0
+        except ValueError:
+            quality = 1.0
+        if quality > 0:
+            accepted.add(name.strip())
+    
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted:
+        return 'gzip'
+    return None
+
+def compress_body(body, encoding):
+    """Compress a response body at a fast level - CPU cost stays small"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=1)
+    return gzip.compress(body, compresslevel=1)
+
+def slice_frame(frame, from_ts, to_ts, countback=0):
+    """Return the bars of a cached frame within [from_ts, to_ts], limited to the last countback"""
+    times = frame['t']
+    start = np.searchsorted(times, from_ts * 1000, side='left')
+    end = np.searchsorted(times, to_ts * 1000, side='right')
+    
+    # Limit to requested count if countback is specified and reasonable
+    if countback > 0 and countback < end - start:
+        start = end - countback
+    
+    return {key: column[start:end] for key, column in frame.items()}
+
+class SingleFlight:
+    """Collapse concurrent calls for the same key into one in-flight execution"""
+    
+    def __init__(self):
+        self._inflight: Dict[Any, Future] = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key, fn, *args):
+        """Run fn(*args) unless a call for key is already running, then share its result"""
+        with self._lock:
+            future = self._inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._inflight[key] = future
+        
+        if not is_leader:
+            return future.result()
+        
+        try:
+            result = fn(*args)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
 class LiveDataServer(BaseHTTPRequestHandler):
-    # Enhanced cache for market data with longer expiry
-    data_cache: Dict[str, Any] = {}
-    cache_expiry: Dict[str, float] = {}
+    # HTTP/1.1 keeps the browser's socket open across /config, /symbols, /history bursts
+    protocol_version = "HTTP/1.1"
+    # Buffer the status line, headers and body into a single send (flushed after each
+    # request by handle_one_request) and set TCP_NODELAY to avoid Nagle stalls
+    wbufsize = 65536
+    disable_nagle_algorithm = True
+    
+    # Status line and headers shared by every JSON response, formatted once (see send_cors_headers)
+    JSON_RESPONSE_HEAD = (
+        b'HTTP/1.1 200 OK\r\n'
+        b'Access-Control-Allow-Origin: *\r\n'
+        b'Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n'
+        b'Access-Control-Allow-Headers: Content-Type\r\n'
+        b'Access-Control-Max-Age: 3600\r\n'
+        b'Content-Type: application/json\r\n'
+    )
+    ENCODING_HEADERS = {
+        'gzip': b'Content-Encoding: gzip\r\nVary: Accept-Encoding\r\n',
+        'br': b'Content-Encoding: br\r\nVary: Accept-Encoding\r\n',
+    }
+    
+    # Serialized /history responses ({encoding: body}) shared by all request threads - 60 second expiry
+    data_cache = TTLCache(maxsize=256, ttl=60)
+    # Cleaned upstream bar columns keyed by (symbol, period, interval)
+    frame_cache = TTLCache(maxsize=128, ttl=60)
+    # Upstream yfinance fetches currently in progress, keyed by (symbol, period, interval)
+    inflight_fetches = SingleFlight()
+    # (unix second, serialized body) of the last /time response
+    time_cache = (0, b'')
     
     # Pre-loaded symbol data for faster responses - COMPREHENSIVE TRADING APP
     ALL_SYMBOLS = [
@@ -195,10 +379,97 @@ class LiveDataServer(BaseHTTPRequestHandler):
         {'symbol': 'VZ', 'full_name': 'Verizon Communications Inc.', 'description': 'Verizon Communications Inc.', 'exchange': 'NYSE', 'type': 'stock'},
     ]
     
+    # yfinance (period, interval) to fetch per chart resolution - ENOUGH HISTORY FOR EACH
+    HISTORY_PERIODS = {
+        '1D': ('2y', '1d'),     # Daily data: at least 2 years of history
+        '240': ('3mo', '1h'),   # 4-hour data: 3 months of hourly data
+        '4h': ('3mo', '1h'),
+        '60': ('2mo', '1h'),    # Hourly data: 2 months
+        '1h': ('2mo', '1h'),
+        '30': ('1mo', '30m'),   # 30-minute data: 1 month
+        '15': ('1mo', '15m'),   # 15-minute data: 1 month
+        '5': ('1mo', '5m'),     # 5-minute data: 1 month
+    }
+    DEFAULT_HISTORY_PERIOD = ('5d', '1m')  # 1-minute or other: 5 days
+    
+    # Bar length in seconds per chart resolution
+    RESOLUTION_SECONDS = {
+        '1': 60,
+        '5': 300,
+        '15': 900,
+        '30': 1800,
+        '60': 3600,
+        '1h': 3600,
+        '240': 14400,
+        '4h': 14400,
+        '1D': 86400,
+    }
+    
+    # Static responses serialized once at import time instead of on every request
+    CONFIG_BYTES = to_json_bytes({
+        "supported_resolutions": ["1", "5", "15", "30", "60", "240", "1D"],
+        "supports_group_request": False,
+        "supports_marks": False,
+        "supports_search": True,
+        "supports_timescale_marks": False
+    })
+    
+    SYMBOL_INFO_BYTES = to_json_bytes({"symbols": [
+        {
+            "symbol": sym['symbol'],
+            "full_name": sym['full_name'],
+            "description": sym['description'],
+            "exchange": sym['exchange'],
+            "currency": "USD",
+            "type": sym['type']
+        }
+        for sym in ALL_SYMBOLS
+    ]})
+    SYMBOL_INFO_ENCODED: Dict[str, bytes] = {}  # Compressed variants, filled on first use
+    
+    # Symbol resolve response - only name, description and ticker vary per request
+    SYMBOL_TEMPLATE = {
+        "name": None,
+        "exchange-traded": "NASDAQ",
+        "exchange-listed": "NASDAQ", 
+        "timezone": "America/New_York",
+        "minmov": 1,
+        "minmov2": 0,
+        "pointvalue": 1,
+        "session": "0930-1600",
+        "has_intraday": True,
+        "has_no_volume": False,
+        "description": None,
+        "type": "stock",
+        "supported_resolutions": ["1", "5", "15", "30", "60", "240", "1D"],
+        "pricescale": 100,
+        "ticker": None
+    }
+    
+    # Search results in response shape, built once
+    SEARCH_RESULTS = [
+        {
+            "symbol": sym['symbol'],
+            "full_name": sym['full_name'],
+            "description": sym['description'],
+            "exchange": sym['exchange'],
+            "ticker": sym['symbol'],
+            "type": sym['type']
+        }
+        for sym in ALL_SYMBOLS
+    ]
+    
+    # Search index of (symbol, uppercase full name, search result) tuples
+    SEARCH_INDEX = [
+        (result['symbol'], result['full_name'].upper(), result)
+        for result in SEARCH_RESULTS
+    ]
+    
     def do_OPTIONS(self):
         """Handle CORS preflight requests"""
         self.send_response(200)
         self.send_cors_headers()
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     def send_cors_headers(self):
@@ -208,14 +479,20 @@ class LiveDataServer(BaseHTTPRequestHandler):
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.send_header('Access-Control-Max-Age', '3600')
     
+    def log_request(self, code='-', size='-'):
+        """Write per-request access logs only in DEBUG mode - errors are still logged"""
+        if DEBUG:
+            super().log_request(code, size)
+    
     def do_GET(self):
         """Handle GET requests for market data"""
         try:
             parsed_url = urlparse(self.path)
             path = parsed_url.path
-            query_params = parse_qs(parsed_url.query)
+            query_params = dict(parse_qsl(parsed_url.query))  # Single-valued params
             
-            print(f"📊 Request: {path} with params: {query_params}")
+            if DEBUG:
+                print(f"📊 Request: {path} with params: {query_params}")
             
             if path == '/config':
                 self.handle_config()
@@ -242,92 +519,45 @@ class LiveDataServer(BaseHTTPRequestHandler):
     
     def handle_config(self):
         """Return datafeed configuration"""
-        config = {
-            "supported_resolutions": ["1", "5", "15", "30", "60", "240", "1D"],
-            "supports_group_request": False,
-            "supports_marks": False,
-            "supports_search": True,
-            "supports_timescale_marks": False
-        }
-        self.send_json_response(config)
+        self.send_bytes_response(self.CONFIG_BYTES)
     
     def handle_symbol_info(self, params):
         """Return symbol information - optimized for speed"""
-        group = params.get('group', [''])[0]
-        symbols = []
-        
-        # Use pre-loaded symbol data for faster response
-        for sym in self.ALL_SYMBOLS:
-            symbols.append({
-                "symbol": sym['symbol'],
-                "full_name": sym['full_name'],
-                "description": sym['description'],
-                "exchange": sym['exchange'],
-                "currency": "USD",
-                "type": sym['type']
-            })
-        
-        self.send_json_response({"symbols": symbols})
+        # Use pre-serialized symbol data for faster response
+        self.send_bytes_response(self.SYMBOL_INFO_BYTES, self.SYMBOL_INFO_ENCODED)
     
     def handle_symbols(self, params):
         """Return symbols for a specific symbol name"""
-        symbol = params.get('symbol', ['AAPL'])[0]
-        
-        symbol_info = {
-            "name": symbol,
-            "exchange-traded": "NASDAQ",
-            "exchange-listed": "NASDAQ", 
-            "timezone": "America/New_York",
-            "minmov": 1,
-            "minmov2": 0,
-            "pointvalue": 1,
-            "session": "0930-1600",
-            "has_intraday": True,
-            "has_no_volume": False,
-            "description": f"{symbol} - Live 2025 Data",
-            "type": "stock",
-            "supported_resolutions": ["1", "5", "15", "30", "60", "240", "1D"],
-            "pricescale": 100,
-            "ticker": symbol
-        }
+        symbol = params.get('symbol', 'AAPL')
         
+        symbol_info = dict(self.SYMBOL_TEMPLATE, name=symbol, description=f"{symbol} - Live 2025 Data", ticker=symbol)
         self.send_json_response(symbol_info)
     
     def handle_search(self, params):
         """Handle symbol search - optimized for speed"""
-        query = params.get('query', [''])[0].upper()
-        limit = int(params.get('limit', [50])[0])  # Increased default limit
+        query = params.get('query', '').upper()
+        limit = int(params.get('limit', 50))  # Increased default limit
         
-        # Filter symbols based on query using pre-loaded data
+        # Filter symbols based on query using the pre-built uppercase index
         if query:
-            filtered = [s for s in self.ALL_SYMBOLS if query in s['symbol'] or query in s['full_name'].upper()]
+            results = [result for symbol, name, result in self.SEARCH_INDEX if query in symbol or query in name]
         else:
-            filtered = self.ALL_SYMBOLS
-        
-        results = []
-        for sym in filtered[:limit]:
-            results.append({
-                "symbol": sym['symbol'],
-                "full_name": sym['full_name'],
-                "description": sym['description'],
-                "exchange": sym['exchange'],
-                "ticker": sym['symbol'],
-                "type": sym['type']
-            })
+            results = self.SEARCH_RESULTS
         
-        self.send_json_response(results)
+        self.send_json_response(results[:limit])
     
     def handle_history(self, params):
         """Return historical market data using yfinance - ENHANCED VERSION WITH HISTORICAL DATA"""
         try:
-            symbol = params.get('symbol', ['AAPL'])[0]
-            resolution = params.get('resolution', ['1D'])[0]
-            from_ts = int(params.get('from', [0])[0])
-            to_ts = int(params.get('to', [int(time.time())])[0])
-            countback = int(params.get('countback', [300])[0])
+            symbol = params.get('symbol', 'AAPL')
+            resolution = params.get('resolution', '1D')
+            from_ts = int(params.get('from', 0))
+            to_ts = int(params.get('to', time.time()))
+            countback = int(params.get('countback', 300))
             
             # Handle invalid/negative timestamps - use current time and countback
             current_time = int(time.time())
+            bar_seconds = self.RESOLUTION_SECONDS.get(resolution, 60)  # 1-minute or other
             
             # Fix invalid timestamps
             if from_ts <= 0 or to_ts <= 0 or from_ts > current_time or to_ts > current_time:
@@ -335,105 +565,29 @@ class LiveDataServer(BaseHTTPRequestHandler):
                 print(f"🔧 Using current time and countback method")
                 to_ts = current_time
                 # Calculate reasonable from_ts based on resolution and countback
-                if resolution == '1D':
-                    from_ts = to_ts - (countback * 24 * 3600)  # countback days
-                elif resolution in ['240', '4h']:
-                    from_ts = to_ts - (countback * 4 * 3600)   # countback 4-hour periods
-                elif resolution in ['60', '1h']:
-                    from_ts = to_ts - (countback * 3600)       # countback hours
-                elif resolution in ['30']:
-                    from_ts = to_ts - (countback * 30 * 60)    # countback 30-min periods
-                elif resolution in ['15']:
-                    from_ts = to_ts - (countback * 15 * 60)    # countback 15-min periods
-                elif resolution in ['5']:
-                    from_ts = to_ts - (countback * 5 * 60)     # countback 5-min periods
-                else:
-                    from_ts = to_ts - (countback * 60)         # countback minutes
-            
-            # Convert timestamps to readable format for debugging
-            from_date = datetime.fromtimestamp(from_ts) if from_ts > 0 else "Not specified"
-            to_date = datetime.fromtimestamp(to_ts) if to_ts > 0 else "Not specified"
+                from_ts = to_ts - countback * bar_seconds
             
-            print(f"📈 Fetching historical data for {symbol} from {from_date} to {to_date}")
-            print(f"🔍 Resolution: {resolution}, Countback: {countback}")
-            print(f"🔍 Raw timestamps: from={from_ts}, to={to_ts}")
+            if DEBUG:
+                print(f"📈 Fetching historical data for {symbol} from {from_ts} to {to_ts}")
+                print(f"🔍 Resolution: {resolution}, Countback: {countback}")
             
-            # Check cache first - cache for 60 seconds for historical data
-            cache_key = f"{symbol}_{resolution}_{from_ts}_{to_ts}"
-            current_cache_time = time.time()
+            # Check cache first - cache for 60 seconds for historical data. The window is
+            # snapped to bar boundaries so requests a few seconds apart share one entry
+            from_key = from_ts - from_ts % bar_seconds
+            to_key = to_ts - to_ts % bar_seconds
+            cache_key = (symbol, resolution, from_key, to_key, countback)
+            cached = self.data_cache.get(cache_key)
             
-            if cache_key in self.data_cache and current_cache_time < self.cache_expiry.get(cache_key, 0):
+            if cached is not None:
                 print(f"⚡ Using cached data for {symbol}")
-                self.send_json_response(self.data_cache[cache_key])
+                self.send_bytes_response(cached[None], cached)
                 return
             
-            # Fetch historical data from yfinance - ALWAYS RETURN DATA
-            ticker = yf.Ticker(symbol)
-            
-            # Determine period and interval - ENSURE WE GET ENOUGH HISTORICAL DATA
-            try:
-                print(f"🔄 Primary data fetch for {symbol}...")
-                
-                if resolution == '1D':
-                    # For daily data, always get at least 2 years of history
-                    hist = ticker.history(period='2y', interval='1d', timeout=20)
-                    print(f"📊 Daily data: 2y period, 1d interval")
-                    
-                elif resolution in ['240', '4h']:
-                    # For 4-hour data, get 3 months of hourly data
-                    hist = ticker.history(period='3mo', interval='1h', timeout=20)
-                    print(f"📊 4-hour data: 3mo period, 1h interval")
-                    
-                elif resolution in ['60', '1h']:
-                    # For hourly data, get 2 months
-                    hist = ticker.history(period='2mo', interval='1h', timeout=20)
-                    print(f"📊 Hourly data: 2mo period, 1h interval")
-                    
-                elif resolution in ['30']:
-                    # For 30-minute data, get 1 month
-                    hist = ticker.history(period='1mo', interval='30m', timeout=20)
-                    print(f"📊 30-minute data: 1mo period, 30m interval")
-                    
-                elif resolution in ['15']:
-                    # For 15-minute data, get 2 weeks
-                    hist = ticker.history(period='1mo', interval='15m', timeout=20)
-                    print(f"📊 15-minute data: 1mo period, 15m interval")
-                    
-                elif resolution in ['5']:
-                    # For 5-minute data, get 1 week
-                    hist = ticker.history(period='1mo', interval='5m', timeout=20)
-                    print(f"📊 5-minute data: 1mo period, 5m interval")
-                    
-                else:  # 1-minute or other
-                    # For 1-minute data, get 5 days
-                    hist = ticker.history(period='5d', interval='1m', timeout=20)
-                    print(f"📊 1-minute data: 5d period, 1m interval")
-                
-                print(f"📋 Primary fetch result: {hist.shape}")
-                
-            except Exception as primary_error:
-                print(f"⚠️ Primary fetch failed: {primary_error}")
-                print(f"🔄 Fallback to daily data...")
-                
-                # Fallback: Always try to get daily data as last resort
-                try:
-                    hist = ticker.history(period='max', interval='1d', timeout=30)
-                    print(f"📊 Fallback daily data: max period, 1d interval")
-                except Exception as fallback_error:
-                    print(f"❌ Fallback failed: {fallback_error}")
-                    hist = pd.DataFrame()  # Empty dataframe
-            
-            # Log data details
-            if not hist.empty:
-                print(f"📋 Data shape: {hist.shape}")
-                print(f"📋 Columns: {list(hist.columns)}")
-                print(f"📋 Date range: {hist.index[0]} to {hist.index[-1]}")
-                print(f"📋 Sample recent data:\n{hist.tail(2)}")
-            else:
-                print(f"⚠️ No data returned for {symbol}")
+            # Cleaned columns for the whole upstream window - panning/zooming reuses one fetch
+            frame = self.get_frame(symbol, resolution)
             
             # If still no data, return a helpful error
-            if hist.empty:
+            if frame is None:
                 print(f"❌ No historical data available for {symbol}")
                 error_response = {
                     "s": "no_data",
@@ -442,71 +596,18 @@ class LiveDataServer(BaseHTTPRequestHandler):
                 self.send_json_response(error_response)
                 return
             
-            # Clean and validate data
-            original_count = len(hist)
-            hist = hist.dropna()  # Remove NaN rows
-            cleaned_count = len(hist)
-            
-            if cleaned_count < original_count:
-                print(f"🧹 Cleaned data: removed {original_count - cleaned_count} invalid rows")
-            
-            if hist.empty:
+            if len(frame['t']) == 0:
                 print(f"⚠️ All data was invalid for {symbol}")
                 self.send_json_response({"s": "no_data", "errmsg": "All historical data contained invalid values"})
                 return
             
-            # Convert to TradingView format - ROBUST CONVERSION
-            bars = []
-            processed_count = 0
-            
-            for index, row in hist.iterrows():
-                try:
-                    # Handle different timestamp formats
-                    if hasattr(index, 'timestamp'):
-                        timestamp = int(index.timestamp())
-                    elif hasattr(index, 'value'):
-                        timestamp = int(index.value // 10**9)  # Convert nanoseconds to seconds
-                    else:
-                        # Fallback: convert to pandas timestamp then to unix
-                        ts = pd.Timestamp(index)
-                        timestamp = int(ts.timestamp())
-                    
-                    # Validate timestamp is reasonable (not negative, not too far in future)
-                    if timestamp < 0 or timestamp > current_time + 86400:  # Not more than 1 day in future
-                        continue
-                    
-                    # Validate price data
-                    if pd.isna(row['Open']) or pd.isna(row['Close']) or pd.isna(row['High']) or pd.isna(row['Low']):
-                        continue
-                    
-                    # Ensure prices are positive
-                    if row['Open'] <= 0 or row['Close'] <= 0 or row['High'] <= 0 or row['Low'] <= 0:
-                        continue
-                        
-                    bar = {
-                        "time": timestamp * 1000,  # TradingView expects milliseconds
-                        "open": round(float(row['Open']), 4),
-                        "high": round(float(row['High']), 4),
-                        "low": round(float(row['Low']), 4),
-                        "close": round(float(row['Close']), 4),
-                        "volume": int(row['Volume']) if 'Volume' in row and pd.notna(row['Volume']) and row['Volume'] >= 0 else 0
-                    }
-                    
-                    # Apply time filtering if valid timestamps
-                    if from_ts > 0 and to_ts > from_ts:
-                        if timestamp < from_ts or timestamp > to_ts:
-                            continue
-                    
-                    bars.append(bar)
-                    processed_count += 1
-                    
-                except Exception as bar_error:
-                    print(f"⚠️ Error processing bar {index}: {bar_error}")
-                    continue
-            
-            print(f"📊 Processed {processed_count} valid bars from {len(hist)} raw records")
+            # Not more than 1 day in future; apply time filtering if valid timestamps
+            if from_ts > 0 and to_ts > from_ts:
+                bars = slice_frame(frame, from_ts, min(to_ts, current_time + 86400), countback)
+            else:
+                bars = slice_frame(frame, 0, current_time + 86400, countback)
             
-            if not bars:
+            if len(bars['t']) == 0:
                 print(f"❌ No valid bars after processing for {symbol}")
                 # Return at least some data message instead of complete failure
                 self.send_json_response({
@@ -515,39 +616,24 @@ class LiveDataServer(BaseHTTPRequestHandler):
                 })
                 return
             
-            # Sort by time to ensure correct chronological order
-            bars.sort(key=lambda x: x['time'])
+            # Create TradingView response format - contiguous numpy columns serialized directly
+            response = {"s": "ok", **bars}
             
-            # Limit to requested count if countback is specified and reasonable
-            if countback > 0 and countback < len(bars):
-                bars = bars[-countback:]  # Get the most recent countback bars
-                print(f"📊 Limited to most recent {countback} bars")
-            
-            # Create TradingView response format
-            response = {
-                "s": "ok",
-                "t": [bar["time"] for bar in bars],
-                "o": [bar["open"] for bar in bars],
-                "h": [bar["high"] for bar in bars],
-                "l": [bar["low"] for bar in bars],
-                "c": [bar["close"] for bar in bars],
-                "v": [bar["volume"] for bar in bars]
-            }
-            
-            # Cache the response for 60 seconds
-            self.data_cache[cache_key] = response
-            self.cache_expiry[cache_key] = current_cache_time + 60
+            # Cache the serialized response for 60 seconds - compressed variants are added on demand
+            body = to_json_bytes(response)
+            encoded = {None: body}
+            self.data_cache.set(cache_key, encoded)
             
             # Log success details
-            if bars:
-                first_time = datetime.fromtimestamp(bars[0]['time']/1000)
-                latest_time = datetime.fromtimestamp(bars[-1]['time']/1000)
-                print(f"✅ Successfully fetched {len(bars)} bars for {symbol}")
+            print(f"✅ Successfully fetched {len(response['t'])} bars for {symbol}")
+            if DEBUG:
+                first_time = datetime.fromtimestamp(response['t'][0]/1000)
+                latest_time = datetime.fromtimestamp(response['t'][-1]/1000)
                 print(f"📊 Time range: {first_time} to {latest_time}")
-                print(f"� Price range: ${bars[0]['close']:.2f} to ${bars[-1]['close']:.2f}")
-                print(f"📈 Latest price: ${bars[-1]['close']:.2f}")
+                print(f"💰 Price range: ${response['c'][0]:.2f} to ${response['c'][-1]:.2f}")
+                print(f"📈 Latest price: ${response['c'][-1]:.2f}")
             
-            self.send_json_response(response)
+            self.send_bytes_response(body, encoded)
             
         except Exception as e:
             print(f"❌ Critical error fetching data for {symbol}: {e}")
@@ -561,16 +647,111 @@ class LiveDataServer(BaseHTTPRequestHandler):
             }
             self.send_json_response(error_response)
     
+    def get_frame(self, symbol, resolution):
+        """Return cached bar columns for a symbol/resolution, fetching from yfinance on a miss"""
+        period, interval = self.HISTORY_PERIODS.get(resolution, self.DEFAULT_HISTORY_PERIOD)
+        frame_key = (symbol, period, interval)
+        
+        frame = self.frame_cache.get(frame_key)
+        if frame is not None:
+            return frame
+        
+        # Concurrent misses for the same upstream window share a single yfinance call
+        return self.inflight_fetches.do(frame_key, self.load_frame, symbol, period, interval)
+    
+    def load_frame(self, symbol, period, interval):
+        """Fetch, clean and cache the bar columns for one upstream window - None if no data"""
+        hist = FETCH_POOL.submit(self.fetch_history, symbol, period, interval).result(timeout=FETCH_TIMEOUT)
+        
+        # Log data details
+        if DEBUG and not hist.empty:
+            print(f"📋 Data shape: {hist.shape}")
+            print(f"📋 Columns: {list(hist.columns)}")
+            print(f"📋 Date range: {hist.index[0]} to {hist.index[-1]}")
+            print(f"📋 Sample recent data:\n{hist.tail(2)}")
+        
+        if hist.empty:
+            return None
+        
+        # Clean and validate data
+        original_count = len(hist)
+        hist = hist.dropna(subset=['Open', 'High', 'Low', 'Close'])  # Remove rows without prices
+        
+        # searchsorted slicing needs chronological order (yfinance normally returns it sorted)
+        if not hist.index.is_monotonic_increasing:
+            hist = hist.sort_index()
+        
+        # Convert to TradingView format - VECTORIZED CONVERSION
+        timestamps = hist.index.values.astype('datetime64[s]').astype('int64')  # UTC unix seconds
+        
+        # Validate timestamps (not negative) and prices (positive)
+        mask = timestamps >= 0
+        mask &= ((hist['Open'] > 0) & (hist['High'] > 0) & (hist['Low'] > 0) & (hist['Close'] > 0)).to_numpy()
+        hist = hist[mask]
+        
+        if len(hist) < original_count:
+            print(f"🧹 Cleaned data: removed {original_count - len(hist)} invalid rows")
+        
+        # Missing or negative volume becomes 0 in one vectorized pass (some indices report none)
+        if 'Volume' in hist:
+            volume = hist['Volume'].fillna(0).clip(lower=0).astype('int64').to_numpy()
+        else:
+            volume = np.zeros(len(hist), dtype=np.int64)
+        
+        frame = {
+            "t": timestamps[mask] * 1000,  # TradingView expects milliseconds
+            "o": np.round(hist['Open'].to_numpy(dtype=np.float64), 4),
+            "h": np.round(hist['High'].to_numpy(dtype=np.float64), 4),
+            "l": np.round(hist['Low'].to_numpy(dtype=np.float64), 4),
+            "c": np.round(hist['Close'].to_numpy(dtype=np.float64), 4),
+            "v": volume
+        }
+        
+        # Daily bars change slowly; intraday windows refresh every minute
+        ttl = 300 if interval == '1d' else 60
+        self.frame_cache.set((symbol, period, interval), frame, ttl=ttl)
+        return frame
+    
+    def fetch_history(self, symbol, period, interval):
+        """Fetch raw OHLCV history for a symbol from yfinance - ALWAYS RETURNS A DATAFRAME"""
+        ticker = yf.Ticker(symbol, session=YF_SESSION)
+        
+        try:
+            print(f"🔄 Primary data fetch for {symbol}: {period} period, {interval} interval")
+            hist = ticker.history(period=period, interval=interval, timeout=20)
+            print(f"📋 Primary fetch result: {hist.shape}")
+            
+        except Exception as primary_error:
+            print(f"⚠️ Primary fetch failed: {primary_error}")
+            print(f"🔄 Fallback to daily data...")
+            
+            # Fallback: Always try to get daily data as last resort
+            try:
+                hist = ticker.history(period='max', interval='1d', timeout=30)
+                print(f"📊 Fallback daily data: max period, 1d interval")
+            except Exception as fallback_error:
+                print(f"❌ Fallback failed: {fallback_error}")
+                hist = pd.DataFrame()  # Empty dataframe
+        
+        return hist
+    
     def handle_time(self):
-        """Return current server time"""
+        """Return current server time - serialized at most once per second"""
         current_time = int(time.time())
-        self.send_json_response(current_time)
+        cached_time, body = self.time_cache
+        
+        if cached_time != current_time:
+            body = to_json_bytes(current_time)
+            # Tuple swap is atomic; a racing thread at worst re-serializes the same second
+            type(self).time_cache = (current_time, body)
+        
+        self.send_bytes_response(body)
     
     def handle_test(self):
         """Test endpoint to verify server functionality"""
         try:
             # Quick test with Apple stock
-            ticker = yf.Ticker('AAPL')
+            ticker = yf.Ticker('AAPL', session=YF_SESSION)
             hist = ticker.history(period='1d', interval='1d', timeout=5)
             
             test_result = {
@@ -610,18 +791,46 @@ class LiveDataServer(BaseHTTPRequestHandler):
     
     def send_json_response(self, data):
         """Send JSON response with CORS headers"""
-        self.send_response(200)
-        self.send_cors_headers()
-        self.send_header('Content-Type', 'application/json')
-        self.end_headers()
+        self.send_bytes_response(to_json_bytes(data))
+    
+    def send_bytes_response(self, body, encoded=None):
+        """Send an already-serialized JSON body with CORS headers, compressed if the client accepts it
+        
+        encoded is an optional {encoding: body} dict used to reuse compressed variants.
+        """
+        encoding = None
+        if len(body) >= COMPRESS_MIN_BYTES:
+            encoding = choose_encoding(self.headers.get('Accept-Encoding', ''))
         
-        json_data = json.dumps(data, indent=2)
-        self.wfile.write(json_data.encode('utf-8'))
+        if encoding is not None:
+            compressed = encoded.get(encoding) if encoded is not None else None
+            if compressed is None:
+                compressed = compress_body(body, encoding)
+                if encoded is not None:
+                    encoded[encoding] = compressed
+            body = compressed
+        
+        # Precompiled status line + static headers, then the per-response ones, in a single write
+        head = [self.JSON_RESPONSE_HEAD]
+        if encoding is not None:
+            head.append(self.ENCODING_HEADERS[encoding])
+        head.append(b'Content-Length: %d\r\n' % len(body))
+        head.append(b'Connection: close\r\n\r\n' if self.close_connection else b'Connection: keep-alive\r\n\r\n')
+        head.append(body)
+        
+        self.log_request(200, len(body))
+        self.wfile.write(b''.join(head))
+
+class LiveHTTPServer(ThreadingHTTPServer):
+    """Threaded HTTP server sized for the burst of requests a chart load produces"""
+    daemon_threads = True
+    # Default listen backlog is 5, which drops connections when several charts load at once
+    request_queue_size = 128
 
 def run_server(port=8083):
     """Run the live data server"""
     server_address = ('', port)
-    httpd = HTTPServer(server_address, LiveDataServer)
+    httpd = LiveHTTPServer(server_address, LiveDataServer)
     
     print(f"🚀 Live Market Data Server running on http://localhost:{port}")
     print(f"📊 Serving real-time data for harmonic patterns analysis")